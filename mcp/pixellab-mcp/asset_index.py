@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Perceptual hash index over generated assets
+Computes 64-bit dHash/pHash with vectorized NumPy and finds near-duplicates
+by Hamming distance using multi-index hashing (4 x 16-bit bucket tables)
+with candidates filtered by a NumPy popcount.
+"""
+
+import json
+import threading
+from itertools import combinations
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterable, Set, Tuple, Union
+
+import numpy as np
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+# PNG text chunk holding the generation parameters of a sprite/tile
+PROMPT_KEY = "pixellab:prompt"
+
+# PNG text chunk marking an animation frame (indexed, but never reused as a sprite/tile)
+FRAME_KEY = "pixellab:frame"
+
+# Hashes are split into 4 16-bit chunks; a match within distance r is within r // 4 on some chunk.
+# Bits are permuted first: pHash/dHash bits are ordered by frequency/row, and sprites on empty
+# backgrounds agree on most low-frequency bits, which would pile them into a few huge buckets.
+CHUNKS = 4
+CHUNK_BITS = 16
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+# Widest per-chunk radius worth enumerating (137 probes per chunk); beyond it a linear scan wins
+MAX_CHUNK_RADIUS = 2
+MAX_INDEXED_DISTANCE = CHUNKS * (MAX_CHUNK_RADIUS + 1) - 1
+
+# Files written by generate_animation that duplicate their frames
+SKIPPED_SUFFIXES = ("_strip.png", "_preview.png")
+
+# Images hashed per NumPy batch during the initial scan
+SCAN_BATCH_SIZE = 256
+
+_DCT_SIZE = 32
+_DCT_MATRIX = np.cos(
+    np.pi * np.outer(np.arange(_DCT_SIZE), 2 * np.arange(_DCT_SIZE) + 1) / (2 * _DCT_SIZE)
+)
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+_BIT_PERMUTATION = np.random.default_rng(0x9E3779B9).permutation(64)
+_PERMUTE_TABLES = [
+    [sum(1 << int(_BIT_PERMUTATION[8 * byte + bit]) for bit in range(8) if value >> bit & 1) for value in range(256)]
+    for byte in range(8)
+]
+_CHUNK_FLIPS = [
+    [sum(1 << bit for bit in bits) for radius in range(r + 1) for bits in combinations(range(CHUNK_BITS), radius)]
+    for r in range(MAX_CHUNK_RADIUS + 1)
+]
+
+
+def _path_key(path: Union[str, Path]) -> str:
+    # One spelling per file, so relative or symlinked paths still match their entry
+    return str(Path(path).resolve())
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _POPCOUNT_TABLE[values.view(np.uint8).reshape(-1, 8)].sum(axis=1)
+
+
+def _permute(value: int) -> int:
+    permuted = 0
+    for byte, table in enumerate(_PERMUTE_TABLES):
+        permuted |= table[(value >> (8 * byte)) & 0xFF]
+    return permuted
+
+
+def prompt_key(**params) -> str:
+    """Canonical string for a set of generation parameters"""
+    normalized = {
+        key: " ".join(value.lower().split()) if isinstance(value, str) else value
+        for key, value in params.items()
+    }
+    return json.dumps(normalized, sort_keys=True)
+
+
+def prompt_pnginfo(prompt: str) -> PngInfo:
+    """PNG metadata that lets the index recognise this prompt after a restart"""
+    info = PngInfo()
+    info.add_text(PROMPT_KEY, prompt)
+    return info
+
+
+def frame_pnginfo() -> PngInfo:
+    """PNG metadata that marks an image as an animation frame after a restart"""
+    info = PngInfo()
+    info.add_text(FRAME_KEY, "1")
+    return info
+
+
+def _grayscale(pil_image: Image.Image) -> Image.Image:
+    # Transparent pixels carry arbitrary RGB; weight luminance by alpha so only the sprite counts
+    rgba = np.asarray(pil_image.convert("RGBA"), dtype=np.float32)
+    luma = rgba[..., 0] * 0.299 + rgba[..., 1] * 0.587 + rgba[..., 2] * 0.114
+    return Image.fromarray((luma * rgba[..., 3] / 255.0).astype(np.uint8), mode="L")
+
+
+def _pack_bits(bits: np.ndarray) -> List[int]:
+    packed = np.packbits(bits.reshape(bits.shape[0], 64), axis=1)
+    return [int(value) for value in np.ascontiguousarray(packed).view(">u8").ravel()]
+
+
+def compute_hashes(pil_images: List[Image.Image]) -> List[Tuple[int, int]]:
+    """
+    Compute (dhash, phash) for a batch of images.
+
+    Resizing happens per image in PIL; the gradient comparison, DCT and
+    median thresholding run once over the whole stacked batch.
+    """
+    if not pil_images:
+        return []
+
+    gray = [_grayscale(image) for image in pil_images]
+
+    small = np.stack([
+        np.asarray(image.resize((9, 8), Image.Resampling.BOX), dtype=np.float32) for image in gray
+    ])
+    dhashes = _pack_bits(small[:, :, 1:] > small[:, :, :-1])
+
+    pixels = np.stack([
+        np.asarray(image.resize((_DCT_SIZE, _DCT_SIZE), Image.Resampling.BOX), dtype=np.float32)
+        for image in gray
+    ])
+    dct = (_DCT_MATRIX @ pixels @ _DCT_MATRIX.T)[:, :8, :8].reshape(len(gray), 64)
+    median = np.median(dct[:, 1:], axis=1, keepdims=True)
+    phashes = _pack_bits(dct > median)
+
+    return list(zip(dhashes, phashes))
+
+
+class AssetIndex:
+    """
+    In-memory perceptual hash index of every generated image.
+
+    Images are keyed by pHash. Each (bit-permuted) hash is split into 4 16-bit
+    chunks with one bucket table per chunk. By pigeonhole, any hash within
+    distance r has some chunk within r // 4 of the query's, so a search probes
+    the few bucket keys near each query chunk, then filters the candidates with
+    one vectorized popcount. Searches wider than MAX_INDEXED_DISTANCE popcount
+    the whole library instead.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+
+        # Entries live in parallel arrays indexed by an integer id; buckets hold ids
+        self._ids: Dict[str, int] = {}
+        self._paths: List[Optional[str]] = []
+        self._entry_prompts: List[Optional[str]] = []
+        self._entry_frames: List[bool] = []
+        self._phashes = np.zeros(1024, dtype=np.uint64)
+        self._dhashes = np.zeros(1024, dtype=np.uint64)
+        self._live = np.zeros(1024, dtype=bool)
+        self._free: List[int] = []
+
+        self._buckets: List[Dict[int, Set[int]]] = [{} for _ in range(CHUNKS)]
+        self._prompts: Dict[str, Set[str]] = {}
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        """True once the initial scan of the output directory has finished"""
+        return self._ready.is_set()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, path: Union[str, Path]) -> bool:
+        return _path_key(path) in self._ids
+
+    def start(self) -> None:
+        """Scan existing images in the background"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._scan, name="pixellab-asset-index", daemon=True)
+            self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def add(
+        self,
+        path: Union[str, Path],
+        pil_image: Image.Image,
+        prompt: Optional[str] = None,
+        frame: bool = False
+    ) -> None:
+        """Index (or re-index) an image that has been saved to path; frame marks animation frames"""
+        dhash, phash = compute_hashes([pil_image])[0]
+        self._insert(_path_key(path), dhash, phash, prompt, frame)
+
+    def discard(self, path: Union[str, Path]) -> None:
+        with self._lock:
+            self._remove(_path_key(path))
+
+    def find_by_prompt(self, prompt: str) -> List[str]:
+        """Paths of images generated with exactly these parameters"""
+        with self._lock:
+            return sorted(self._prompts.get(prompt, ()))
+
+    def find_similar(
+        self,
+        pil_image: Image.Image,
+        max_distance: int = 5,
+        limit: Optional[int] = 10,
+        exclude: Optional[Union[str, Path]] = None
+    ) -> List[Dict[str, Any]]:
+        """Indexed images within max_distance (pHash bits) of pil_image, closest first (limit=None for all)"""
+        dhash, phash = compute_hashes([pil_image])[0]
+        return self.search(phash, dhash, max_distance, limit, exclude)
+
+    def search(
+        self,
+        phash: int,
+        dhash: Optional[int] = None,
+        max_distance: int = 5,
+        limit: Optional[int] = 10,
+        exclude: Optional[Union[str, Path]] = None
+    ) -> List[Dict[str, Any]]:
+        exclude = _path_key(exclude) if exclude is not None else None
+
+        with self._lock:
+            if max_distance <= MAX_INDEXED_DISTANCE:
+                key = _permute(phash)
+                flips = _CHUNK_FLIPS[max_distance // CHUNKS]
+                hits = []
+                for chunk, bucket in enumerate(self._buckets):
+                    chunk_key = self._chunk(key, chunk)
+                    for flip in flips:
+                        ids = bucket.get(chunk_key ^ flip)
+                        if ids:
+                            hits.append(ids)
+                if not hits:
+                    return []
+                candidates = np.fromiter(set().union(*hits), dtype=np.intp)
+            else:
+                candidates = np.flatnonzero(self._live)
+
+            distances = _popcount(self._phashes[candidates] ^ np.uint64(phash)).astype(np.intp)
+            within = distances <= max_distance
+            candidates, distances = candidates[within], distances[within]
+            dhash_distances = (
+                _popcount(self._dhashes[candidates] ^ np.uint64(dhash)).astype(np.intp)
+                if dhash is not None else None
+            )
+
+            matches = []
+            for i, entry_id in enumerate(candidates):
+                path = self._paths[entry_id]
+                if path == exclude:
+                    continue
+                matches.append({
+                    "file_path": path,
+                    "distance": int(distances[i]),
+                    "dhash_distance": int(dhash_distances[i]) if dhash_distances is not None else None,
+                    "frame": self._entry_frames[entry_id]
+                })
+
+        matches.sort(key=lambda match: (match["distance"], match["dhash_distance"] or 0, match["file_path"]))
+        return matches[:limit]
+
+    @staticmethod
+    def _chunk(value: int, chunk: int) -> int:
+        return (value >> (CHUNK_BITS * chunk)) & CHUNK_MASK
+
+    def _insert(self, path: str, dhash: int, phash: int, prompt: Optional[str], frame: bool = False) -> None:
+        with self._lock:
+            self._remove(path)
+
+            if self._free:
+                entry_id = self._free.pop()
+                self._paths[entry_id] = path
+                self._entry_prompts[entry_id] = prompt
+                self._entry_frames[entry_id] = frame
+            else:
+                entry_id = len(self._paths)
+                self._paths.append(path)
+                self._entry_prompts.append(prompt)
+                self._entry_frames.append(frame)
+                if entry_id >= len(self._live):
+                    self._grow()
+
+            self._ids[path] = entry_id
+            self._phashes[entry_id] = phash
+            self._dhashes[entry_id] = dhash
+            self._live[entry_id] = True
+
+            key = _permute(phash)
+            for chunk, bucket in enumerate(self._buckets):
+                bucket.setdefault(self._chunk(key, chunk), set()).add(entry_id)
+            if prompt:
+                self._prompts.setdefault(prompt, set()).add(path)
+
+    def _grow(self) -> None:
+        # Called with self._lock held
+        size = len(self._live) * 2
+        self._phashes = np.resize(self._phashes, size)
+        self._dhashes = np.resize(self._dhashes, size)
+        live = np.zeros(size, dtype=bool)
+        live[:len(self._live)] = self._live
+        self._live = live
+
+    def _remove(self, path: str) -> None:
+        # Called with self._lock held
+        entry_id = self._ids.pop(path, None)
+        if entry_id is None:
+            return
+
+        key = _permute(int(self._phashes[entry_id]))
+        for chunk, bucket in enumerate(self._buckets):
+            chunk_key = self._chunk(key, chunk)
+            bucket[chunk_key].discard(entry_id)
+            if not bucket[chunk_key]:
+                del bucket[chunk_key]
+
+        prompt = self._entry_prompts[entry_id]
+        if prompt:
+            self._prompts[prompt].discard(path)
+            if not self._prompts[prompt]:
+                del self._prompts[prompt]
+
+        self._live[entry_id] = False
+        self._paths[entry_id] = None
+        self._entry_prompts[entry_id] = None
+        self._entry_frames[entry_id] = False
+        self._free.append(entry_id)
+
+    def _iter_files(self) -> Iterable[Path]:
+        if not self.root.is_dir():
+            return
+        for path in self.root.rglob("*.png"):
+            if path.name.startswith(".") or path.name.endswith(SKIPPED_SUFFIXES):
+                continue
+            yield path
+
+    def _scan(self) -> None:
+        try:
+            batch: List[Tuple[str, Image.Image, Optional[str], bool]] = []
+            for path in self._iter_files():
+                # Anything added while scanning is newer than what's on disk
+                if path in self:
+                    continue
+                try:
+                    with Image.open(path) as image:
+                        image.load()
+                        text = getattr(image, "text", {})
+                        batch.append((_path_key(path), image.copy(), text.get(PROMPT_KEY), FRAME_KEY in text))
+                except Exception:
+                    continue
+
+                if len(batch) >= SCAN_BATCH_SIZE:
+                    self._index_batch(batch)
+                    batch = []
+
+            self._index_batch(batch)
+        finally:
+            self._ready.set()
+
+    def _index_batch(self, batch: List[Tuple[str, Image.Image, Optional[str], bool]]) -> None:
+        hashes = compute_hashes([image for _, image, _, _ in batch])
+        with self._lock:
+            for (path, _, prompt, frame), (dhash, phash) in zip(batch, hashes):
+                if path not in self:
+                    self._insert(path, dhash, phash, prompt, frame)
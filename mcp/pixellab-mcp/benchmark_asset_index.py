@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark AssetIndex search on realistic sprite hashes
+Hashes synthetic transparent-background sprites (not random ints, which spread
+evenly over the buckets and flatter the numbers) and times find_similar lookups.
+
+Usage: python3 benchmark_asset_index.py [n_images]
+"""
+import random
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+from asset_index import AssetIndex, compute_hashes
+
+N_IMAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+N_QUERIES = 200
+DISTANCES = [3, 5, 8, 11]
+
+rng = random.Random(0)
+
+
+def make_sprite():
+    """Centered blob of a few shapes on a transparent background, like a generated sprite"""
+    size = rng.choice([24, 32, 48])
+    image = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    for _ in range(rng.randrange(2, 6)):
+        w, h = rng.randrange(3, size // 2), rng.randrange(3, size // 2)
+        x = size // 2 - w // 2 + rng.randrange(-4, 5)
+        y = size // 2 - h // 2 + rng.randrange(-6, 7)
+        fill = (rng.randrange(256), rng.randrange(256), rng.randrange(256), 255)
+        shape = draw.ellipse if rng.random() < 0.5 else draw.rectangle
+        shape([x, y, x + w, y + h], fill=fill)
+    return image
+
+
+print("=" * 60)
+print("AssetIndex Search Benchmark")
+print("=" * 60)
+
+print(f"\n[1/3] Hashing {N_IMAGES:,} synthetic sprites...")
+start = time.perf_counter()
+hashes = []
+for _ in range(0, N_IMAGES, 500):
+    hashes += compute_hashes([make_sprite() for _ in range(500)])
+hashes = hashes[:N_IMAGES]
+print(f"   ✅ {time.perf_counter() - start:.1f}s")
+
+print("\n[2/3] Building index...")
+index = AssetIndex("/nonexistent")
+for i, (dhash, phash) in enumerate(hashes):
+    index._insert(f"/sprites/sprite_{i}.png", dhash, phash, None)
+largest = [max(map(len, bucket.values())) for bucket in index._buckets]
+print(f"   ✅ {len(index):,} images, largest bucket per chunk: {largest}")
+
+print(f"\n[3/3] Timing {N_QUERIES} queries per distance...")
+queries = [hashes[rng.randrange(N_IMAGES)] for _ in range(N_QUERIES)]
+for max_distance in DISTANCES:
+    start = time.perf_counter()
+    found = 0
+    for dhash, phash in queries:
+        found += len(index.search(phash, dhash, max_distance, limit=None))
+    elapsed_ms = (time.perf_counter() - start) / N_QUERIES * 1000
+    print(f"   r={max_distance:<2} {elapsed_ms:.3f} ms/query  ({found / N_QUERIES:.1f} matches avg)")
+
+print("\n" + "=" * 60)
+print("Benchmark Complete!")
+print("=" * 60)
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Write-behind output writer for generated assets
+Encoded files are queued from the request path and written by a background
+thread using temp files + atomic rename, so the dev server never serves a
+truncated PNG. fsyncs are batched per drain of the queue.
+"""
+
+import io
+import os
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, List, Set, Tuple, Union
+
+# Max files written between one round of fsyncs
+DEFAULT_BATCH_SIZE = 32
+
+# Temp files older than this at startup were left behind by a crashed writer
+STALE_TMP_AGE = 300
+
+# Matches temp names from _write_temp: ".<name>.<pid>.tmp"
+_TMP_NAME = re.compile(r"^\..+\.\d+\.tmp$")
+
+
+def encode_image(pil_image, format: str = "PNG", **params) -> bytes:
+    """Encode a PIL image in memory so it can be handed to the writer"""
+    buffer = io.BytesIO()
+    pil_image.save(buffer, format=format, **params)
+    return buffer.getvalue()
+
+
+class OutputWriter:
+    """
+    Background writer for generated assets.
+
+    submit() returns as soon as the payload is queued. The writer thread drains
+    the queue in batches: every file is written to a temp file next to its
+    destination, all temp files are fsynced, renamed into place with
+    os.replace(), and each touched directory is fsynced once.
+
+    When given a root, the writer thread first removes stale temp files under it.
+    """
+
+    def __init__(
+        self,
+        root: Optional[Union[str, Path]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        fsync: bool = True
+    ):
+        self.root = Path(root) if root is not None else None
+        self.batch_size = batch_size
+        self.fsync = fsync
+
+        self._queue: "queue.Queue[Optional[Tuple[Path, bytes, Optional[Callable[[Path], None]]]]]" = queue.Queue()
+        self._known_dirs: Set[Path] = set()
+        self._pending = 0
+        self._written = 0
+        self._errors: List[Dict[str, Any]] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(
+        self,
+        path: Union[str, Path],
+        data: bytes,
+        on_written: Optional[Callable[[Path], None]] = None
+    ) -> Path:
+        """
+        Queue data to be written to path and return the destination path.
+
+        on_written runs on the writer thread once the file is in place; it is
+        not called if the write fails or a later submit for the same path
+        replaces this one in the same batch.
+        """
+        path = Path(path)
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("OutputWriter is closed")
+            self._pending += 1
+            self._start()
+
+        self._queue.put((path, data, on_written))
+        return path
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every queued write is durable on disk, leaving errors for flush().
+
+        Returns:
+            True if the queue drained before the timeout
+        """
+        with self._condition:
+            return self._wait_drained(timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Block until every queued write is durable on disk and collect write errors.
+
+        Returns:
+            Dictionary with write counts and any errors since the last flush
+        """
+        with self._condition:
+            self._wait_drained(timeout)
+            errors, self._errors = self._errors, []
+            return {
+                "ok": not self._pending and not errors,
+                "pending": self._pending,
+                "written": self._written,
+                "errors": errors if errors else None
+            }
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Drain the queue and stop the writer thread"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _wait_drained(self, timeout: Optional[float]) -> bool:
+        # Called with self._condition held
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._pending:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._condition.wait(remaining)
+        return True
+
+    def _start(self) -> None:
+        # Called with self._condition held
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pixellab-output-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        self._remove_stale_temp_files()
+
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            jobs = [job for job in batch if job is not None]
+            if jobs:
+                self._write_batch(jobs)
+            if stop:
+                return
+
+    def _write_batch(self, jobs: List[Tuple[Path, bytes, Optional[Callable[[Path], None]]]]) -> None:
+        # Later submissions for the same path win; only the last one is written
+        latest: Dict[Path, Tuple[bytes, Optional[Callable[[Path], None]]]] = {}
+        for path, data, on_written in jobs:
+            latest.pop(path, None)
+            latest[path] = (data, on_written)
+
+        # Per path: None once written, otherwise the error message
+        results: Dict[Path, Optional[str]] = {}
+        try:
+            staged = []
+            for path, (data, _) in latest.items():
+                try:
+                    staged.append((self._write_temp(path, data), path))
+                except Exception as e:
+                    results[path] = str(e)
+
+            synced_dirs = set()
+            for tmp_path, path in staged:
+                try:
+                    os.replace(tmp_path, path)
+                    results[path] = None
+                    synced_dirs.add(path.parent)
+                except Exception as e:
+                    results[path] = str(e)
+                    try:
+                        tmp_path.unlink()
+                    except OSError:
+                        pass
+
+            if self.fsync:
+                for directory in synced_dirs:
+                    self._fsync_dir(directory)
+
+        except Exception as e:
+            for path in latest:
+                results.setdefault(path, f"Write batch failed: {e}")
+
+        finally:
+            for path in latest:
+                results.setdefault(path, "Write batch aborted")
+            errors = [
+                {"file_path": str(path), "error": error} for path, error in results.items() if error is not None
+            ]
+            for path, (_, on_written) in latest.items():
+                if on_written is None or results[path] is not None:
+                    continue
+                try:
+                    on_written(path)
+                except Exception as e:
+                    errors.append({"file_path": str(path), "error": f"on_written callback failed: {e}"})
+            with self._condition:
+                self._pending -= len(jobs)
+                self._written += sum(1 for error in results.values() if error is None)
+                self._errors.extend(errors)
+                self._condition.notify_all()
+
+    def _write_temp(self, path: Path, data: bytes) -> Path:
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        self._ensure_dir(path.parent)
+        try:
+            f = open(tmp_path, "wb")
+        except FileNotFoundError:
+            # Directory was removed behind our back; forget it and recreate
+            self._known_dirs.discard(path.parent)
+            self._ensure_dir(path.parent)
+            f = open(tmp_path, "wb")
+
+        with f:
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        return tmp_path
+
+    def _remove_stale_temp_files(self) -> None:
+        if self.root is None or not self.root.is_dir():
+            return
+        cutoff = time.time() - STALE_TMP_AGE
+        try:
+            for tmp_path in self.root.rglob(".*.tmp"):
+                try:
+                    if not _TMP_NAME.match(tmp_path.name):
+                        continue
+                    if tmp_path.is_file() and tmp_path.stat().st_mtime < cutoff:
+                        tmp_path.unlink()
+                except OSError:
+                    continue
+        except OSError:
+            pass
+
+    def _ensure_dir(self, directory: Path) -> None:
+        if directory not in self._known_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._known_dirs.add(directory)
+
+    @staticmethod
+    def _fsync_dir(directory: Path) -> None:
+        # Persists the renames; directories can't be opened for fsync on Windows
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
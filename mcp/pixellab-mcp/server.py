@@ -6,10 +6,16 @@ Uses pixellab SDK v1.0.5 with generate_image_pixflux
 """
 
 import os
+import json
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 import pixellab
+from PIL import Image
 from mcp.server.fastmcp import FastMCP
+from output_writer import OutputWriter, encode_image
+from asset_index import AssetIndex, frame_pnginfo, prompt_key, prompt_pnginfo
 
 # Configuration
 PIXELLAB_TOKEN = os.environ.get("PIXELLAB_TOKEN", "fcb0392c-15e9-4c8a-936d-15e05ec8b7e6")
@@ -18,9 +24,85 @@ DEFAULT_OUTPUT_DIR = os.environ.get(
     str(Path.home() / "GOLDKEY CHATTY" / "gkchatty-ecosystem" / "commisocial" / "public" / "assets" / "sprites")
 )
 
+# Concurrent frame requests per animation (keeps us polite with the API rate limits)
+ANIMATION_MAX_WORKERS = int(os.environ.get("PIXELLAB_ANIMATION_WORKERS", "4"))
+
+# Max pHash Hamming distance (out of 64 bits) for two images to count as near-duplicates
+SIMILARITY_THRESHOLD = int(os.environ.get("PIXELLAB_SIMILARITY_THRESHOLD", "5"))
+
+# Max seconds a tool waits for queued writes before reading files back
+FLUSH_TIMEOUT = 30.0
+
+# Max seconds a lookup waits for the startup scan of existing assets
+INDEX_SCAN_TIMEOUT = 30.0
+
 # Create PixelLab client
 pixellab_client = pixellab.Client(secret=PIXELLAB_TOKEN)
 
+# Background writer for all generated files (atomic renames, batched fsyncs)
+output_writer = OutputWriter(DEFAULT_OUTPUT_DIR)
+atexit.register(output_writer.close)
+
+# Perceptual hash index of generated assets (existing files are scanned in the background)
+asset_index = AssetIndex(DEFAULT_OUTPUT_DIR)
+asset_index.start()
+
+def _index_when_written(pil_image: Image.Image, prompt: Optional[str] = None, frame: bool = False):
+    """Writer callback that indexes an image once its file is safely on disk"""
+    return lambda path: asset_index.add(path, pil_image, prompt, frame=frame)
+
+def _existing_matches(
+    pil_image: Image.Image,
+    max_distance: int = SIMILARITY_THRESHOLD,
+    exclude: Optional[Path] = None
+) -> List[Dict[str, Any]]:
+    """Near-duplicates of pil_image that are still on disk; entries for deleted files are dropped"""
+    asset_index.wait(INDEX_SCAN_TIMEOUT)
+    matches = []
+    for match in asset_index.find_similar(pil_image, max_distance=max_distance, limit=None, exclude=exclude):
+        if Path(match["file_path"]).exists():
+            matches.append(match)
+        else:
+            asset_index.discard(match["file_path"])
+    return matches
+
+def _find_reusable(prompt: str, pil_image: Optional[Image.Image] = None) -> Optional[Dict[str, Any]]:
+    """
+    Look up an existing sprite or tile instead of keeping a new one.
+
+    Without an image, matches assets generated with identical parameters (before calling the API).
+    With an image, matches the closest near-duplicate within SIMILARITY_THRESHOLD.
+    Animation frames are never reused as standalone assets.
+    """
+    if pil_image is None:
+        # Assets are only indexed once written (or scanned), so let both catch up first
+        output_writer.wait(FLUSH_TIMEOUT)
+        asset_index.wait(INDEX_SCAN_TIMEOUT)
+        for path in asset_index.find_by_prompt(prompt):
+            if Path(path).exists():
+                return {"file_path": path, "match": "prompt", "distance": 0}
+            asset_index.discard(path)
+        return None
+
+    for match in _existing_matches(pil_image):
+        if not match["frame"]:
+            return {"file_path": match["file_path"], "match": "similar", "distance": match["distance"]}
+    return None
+
+def _reused_result(reused: Dict[str, Any], kind: str, **details) -> Dict[str, Any]:
+    how = "same parameters" if reused["match"] == "prompt" else f"near-duplicate, distance {reused['distance']}"
+    return {
+        "ok": True,
+        "reused": True,
+        "file_path": reused["file_path"],
+        "filename": Path(reused["file_path"]).name,
+        **details,
+        "match": reused["match"],
+        "distance": reused["distance"],
+        "index_complete": asset_index.ready,
+        "message": f"♻️ Reusing existing {kind.lower()} {reused['file_path']} ({how})"
+    }
+
 # Create FastMCP server
 mcp = FastMCP("PixelLab MCP")
 
@@ -56,7 +138,8 @@ def generate_sprite(
     view: str = "low top-down",
     direction: str = "south",
     no_background: bool = True,
-    output_dir: Optional[str] = None
+    output_dir: Optional[str] = None,
+    reuse_existing: bool = False
 ) -> Dict[str, Any]:
     """
     Generate a single sprite with PixelLab.
@@ -70,11 +153,23 @@ def generate_sprite(
         direction: Facing direction - "north", "south", "east", "west" (default: "south")
         no_background: Transparent background (default: True)
         output_dir: Directory to save sprite (default: project assets)
+        reuse_existing: Return an existing sprite with the same parameters without calling the API,
+            and keep an existing near-duplicate instead of saving a new one (default: False)
 
     Returns:
         Dictionary with file path and generation details
     """
+    prompt = prompt_key(
+        kind="sprite", description=description, width=width, height=height,
+        view=view, direction=direction, no_background=no_background
+    )
+
     try:
+        reused = _find_reusable(prompt) if reuse_existing else None
+        if reused:
+            return _reused_result(reused, "Sprite", size=f"{width}x{height}", direction=direction,
+                                  view=view, description=description)
+
         # Generate sprite using PixelFlux
         response = pixellab_client.generate_image_pixflux(
             description=f"{description}, pixel art style",
@@ -91,15 +186,25 @@ def generate_sprite(
                 "description": description
             }
 
-        # Save sprite
+        # Queue sprite for writing
         output_path = Path(output_dir or DEFAULT_OUTPUT_DIR)
-        output_path.mkdir(parents=True, exist_ok=True)
 
         filename = f"{name.lower().replace(' ', '_')}_{direction}.png"
         file_path = output_path / filename
 
         pil_image = response.image.pil_image()
-        pil_image.save(file_path)
+
+        reused = _find_reusable(prompt, pil_image) if reuse_existing else None
+        if reused:
+            return _reused_result(reused, "Sprite", size=f"{width}x{height}", direction=direction,
+                                  view=view, description=description)
+
+        similar = _existing_matches(pil_image, exclude=file_path)[:3]
+        output_writer.submit(
+            file_path,
+            encode_image(pil_image, pnginfo=prompt_pnginfo(prompt)),
+            on_written=_index_when_written(pil_image, prompt)
+        )
 
         return {
             "ok": True,
@@ -109,7 +214,9 @@ def generate_sprite(
             "direction": direction,
             "view": view,
             "description": description,
-            "message": f"✅ Sprite saved to {file_path}"
+            "similar_existing": similar if similar else None,
+            "index_complete": asset_index.ready,
+            "message": f"✅ Sprite queued for {file_path} (call flush_writes to wait for disk)"
         }
 
     except Exception as e:
@@ -125,7 +232,8 @@ def generate_character_set(
     name: str = "character",
     size: int = 48,
     directions: Optional[List[str]] = None,
-    output_dir: Optional[str] = None
+    output_dir: Optional[str] = None,
+    reuse_existing: bool = False
 ) -> Dict[str, Any]:
     """
     Generate multiple directional sprites for a character.
@@ -136,6 +244,7 @@ def generate_character_set(
         size: Sprite size in pixels (default: 48)
         directions: List of directions - ["north", "south", "east", "west"] (default: all 4)
         output_dir: Directory to save sprites (default: project assets)
+        reuse_existing: Reuse matching sprites instead of generating new ones (default: False)
 
     Returns:
         Dictionary with all generated file paths
@@ -155,7 +264,8 @@ def generate_character_set(
             view="low top-down",
             direction=direction,
             no_background=True,
-            output_dir=output_dir
+            output_dir=output_dir,
+            reuse_existing=reuse_existing
         )
 
         if result.get("ok"):
@@ -190,7 +300,8 @@ def generate_tile(
     name: str = "tile",
     size: int = 32,
     isometric: bool = False,
-    output_dir: Optional[str] = None
+    output_dir: Optional[str] = None,
+    reuse_existing: bool = False
 ) -> Dict[str, Any]:
     """
     Generate an isometric or top-down tile.
@@ -201,11 +312,20 @@ def generate_tile(
         size: Tile size in pixels (default: 32)
         isometric: Use isometric projection (default: False)
         output_dir: Directory to save tile (default: project assets/tiles)
+        reuse_existing: Return an existing tile with the same parameters without calling the API,
+            and keep an existing near-duplicate instead of saving a new one (default: False)
 
     Returns:
         Dictionary with tile file path
     """
+    prompt = prompt_key(kind="tile", description=description, size=size, isometric=isometric)
+
     try:
+        reused = _find_reusable(prompt) if reuse_existing else None
+        if reused:
+            return _reused_result(reused, "Tile", size=f"{size}x{size}", isometric=isometric,
+                                  description=description)
+
         # Generate tile
         response = pixellab_client.generate_image_pixflux(
             description=f"{description}, pixel art tile",
@@ -221,15 +341,25 @@ def generate_tile(
                 "description": description
             }
 
-        # Save tile
+        # Queue tile for writing
         output_path = Path(output_dir or DEFAULT_OUTPUT_DIR) / "tiles"
-        output_path.mkdir(parents=True, exist_ok=True)
 
         filename = f"{name.lower().replace(' ', '_')}.png"
         file_path = output_path / filename
 
         pil_image = response.image.pil_image()
-        pil_image.save(file_path)
+
+        reused = _find_reusable(prompt, pil_image) if reuse_existing else None
+        if reused:
+            return _reused_result(reused, "Tile", size=f"{size}x{size}", isometric=isometric,
+                                  description=description)
+
+        similar = _existing_matches(pil_image, exclude=file_path)[:3]
+        output_writer.submit(
+            file_path,
+            encode_image(pil_image, pnginfo=prompt_pnginfo(prompt)),
+            on_written=_index_when_written(pil_image, prompt)
+        )
 
         return {
             "ok": True,
@@ -238,7 +368,9 @@ def generate_tile(
             "size": f"{size}x{size}",
             "isometric": isometric,
             "description": description,
-            "message": f"✅ Tile saved to {file_path}"
+            "similar_existing": similar if similar else None,
+            "index_complete": asset_index.ready,
+            "message": f"✅ Tile queued for {file_path} (call flush_writes to wait for disk)"
         }
 
     except Exception as e:
@@ -248,6 +380,442 @@ def generate_tile(
             "description": description
         }
 
+def _animation_paths(output_dir: Optional[str], name: str, direction: str) -> Dict[str, Any]:
+    """Resolve the file layout for an animation: frames, strip, preview and metadata"""
+    base = f"{name.lower().replace(' ', '_')}_{direction}"
+    directory = Path(output_dir or DEFAULT_OUTPUT_DIR) / "animations" / name.lower().replace(' ', '_')
+    return {
+        "directory": directory,
+        "base": base,
+        "strip": directory / f"{base}_strip.png",
+        "metadata": directory / f"{base}.json",
+    }
+
+def _frame_filename(base: str, index: int) -> str:
+    return f"{base}_frame{index:02d}.png"
+
+def _generate_frame(metadata: Dict[str, Any], index: int) -> Image.Image:
+    """Generate a single animation frame from the stored animation metadata"""
+    frame = metadata["frames"][index]
+    response = pixellab_client.generate_image_pixflux(
+        description=(
+            f"{metadata['description']}, {frame['pose']}, "
+            f"animation frame {index + 1} of {metadata['frame_count']}, pixel art style"
+        ),
+        image_size=dict(width=metadata["frame_width"], height=metadata["frame_height"]),
+        view=metadata["view"],
+        direction=metadata["direction"],
+        no_background=metadata["no_background"]
+    )
+
+    if not response.image:
+        raise RuntimeError("No image in response")
+
+    return _fit_frame(response.image.pil_image(), metadata)
+
+def _fit_frame(frame_image: Image.Image, metadata: Dict[str, Any]) -> Image.Image:
+    """Force a frame to the animation's frame size so strip offsets and metadata rectangles line up"""
+    frame_image = frame_image.convert("RGBA")
+    size = (metadata["frame_width"], metadata["frame_height"])
+    if frame_image.size != size:
+        frame_image = frame_image.resize(size, Image.NEAREST)
+    return frame_image
+
+def _assemble_animation(directory: Path, metadata: Dict[str, Any], frames: List[Image.Image]) -> None:
+    """
+    Queue the horizontal sprite strip and optional preview built from the frames.
+
+    Only runs once every frame exists; a partially generated animation keeps its
+    frames and metadata so the missing ones can be regenerated individually.
+    """
+    frame_width = metadata["frame_width"]
+    frame_height = metadata["frame_height"]
+
+    strip = Image.new("RGBA", (frame_width * len(frames), frame_height), (0, 0, 0, 0))
+    for index, frame_image in enumerate(frames):
+        strip.paste(frame_image, (index * frame_width, 0))
+    output_writer.submit(directory / metadata["strip"], encode_image(strip))
+
+    preview_format = metadata.get("preview_format")
+    if not preview_format:
+        return
+
+    durations = [frame["duration_ms"] for frame in metadata["frames"]]
+    if preview_format == "gif":
+        preview = encode_image(
+            frames[0],
+            format="GIF",
+            save_all=True,
+            append_images=frames[1:],
+            duration=durations,
+            loop=0,
+            disposal=2
+        )
+    else:
+        preview = encode_image(
+            frames[0],
+            format="PNG",
+            save_all=True,
+            append_images=frames[1:],
+            duration=durations,
+            loop=0,
+            disposal=1
+        )
+    output_writer.submit(directory / metadata["preview"], preview)
+
+def _clear_stale_animation_outputs(directory: Path, base: str, metadata: Dict[str, Any]) -> None:
+    """
+    Remove outputs of an earlier run under the same name/direction that this run won't overwrite.
+
+    The strip and previews always go (they are rewritten only once every frame exists), as do
+    frames beyond the new frame_count and old files for frames that failed in this run.
+    """
+    # A previous run's files may still be queued; let them land before deleting
+    output_writer.wait(FLUSH_TIMEOUT)
+
+    if not directory.is_dir():
+        return
+
+    stale = [directory / f"{base}_strip.png", directory / f"{base}_preview.gif", directory / f"{base}_preview.png"]
+    prefix = f"{base}_frame"
+    for path in directory.glob(f"{prefix}*.png"):
+        index = path.stem[len(prefix):]
+        if not index.isdigit():
+            continue
+        index = int(index)
+        if index >= metadata["frame_count"] or not metadata["frames"][index]["file"]:
+            stale.append(path)
+
+    for path in stale:
+        asset_index.discard(path)
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+def _animation_result(directory: Path, metadata: Dict[str, Any], errors: List[Dict[str, Any]]) -> Dict[str, Any]:
+    complete = all(frame["file"] for frame in metadata["frames"])
+    result = {
+        "ok": complete,
+        "animation_name": metadata["name"],
+        "direction": metadata["direction"],
+        "frame_count": metadata["frame_count"],
+        "frame_size": f"{metadata['frame_width']}x{metadata['frame_height']}",
+        "directory": str(directory),
+        "frames": [str(directory / frame["file"]) if frame["file"] else None for frame in metadata["frames"]],
+        "metadata_path": str(directory / metadata["metadata"]),
+        "errors": errors if errors else None
+    }
+
+    if complete:
+        result["strip_path"] = str(directory / metadata["strip"])
+        result["preview_path"] = str(directory / metadata["preview"]) if metadata.get("preview") else None
+        result["message"] = f"✅ Animation queued for {directory / metadata['strip']} (call flush_writes to wait for disk)"
+    else:
+        missing = [frame["index"] for frame in metadata["frames"] if not frame["file"]]
+        result["missing_frames"] = missing
+        result["strip_path"] = None
+        result["preview_path"] = None
+        result["error"] = (
+            f"Failed to generate frames {missing}; no strip or preview is written until "
+            f"regenerate_animation_frame fills them in"
+        )
+
+    return result
+
+@mcp.tool()
+def generate_animation(
+    description: str,
+    name: str = "animation",
+    frame_count: Optional[int] = None,
+    pose_hints: Optional[List[str]] = None,
+    width: int = 48,
+    height: int = 48,
+    view: str = "side",
+    direction: str = "east",
+    no_background: bool = True,
+    fps: int = 8,
+    frame_durations: Optional[List[int]] = None,
+    preview_format: Optional[str] = "gif",
+    output_dir: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Generate an animation (e.g., walk cycle, jump) as a horizontal sprite strip.
+
+    Frames are generated concurrently, then assembled into a sprite strip with an
+    optional animated preview and a JSON file describing frame positions and timing.
+
+    Args:
+        description: Base description shared by every frame (e.g., "hero with red cap and blue overalls")
+        name: Animation name (used in filenames, e.g., "player-walk")
+        frame_count: Number of frames (default: number of pose_hints, or 4)
+        pose_hints: Per-frame pose descriptions (e.g., ["left foot forward", "legs together", ...])
+        width: Frame width in pixels (default: 48)
+        height: Frame height in pixels (default: 48)
+        view: Camera view - "low top-down", "side", "isometric" (default: "side")
+        direction: Facing direction - "north", "south", "east", "west" (default: "east")
+        no_background: Transparent background (default: True)
+        fps: Playback speed used for frame timing (default: 8)
+        frame_durations: Per-frame durations in milliseconds (overrides fps)
+        preview_format: "gif", "apng" or None for no preview (default: "gif")
+        output_dir: Directory to save the animation (default: project assets/animations)
+
+    Returns:
+        Dictionary with strip, preview, frame and metadata paths
+    """
+    if frame_count is None:
+        frame_count = len(pose_hints) if pose_hints else 4
+
+    if frame_count < 1:
+        return {"ok": False, "error": "frame_count must be at least 1", "description": description}
+
+    if pose_hints is not None and len(pose_hints) != frame_count:
+        return {
+            "ok": False,
+            "error": f"Got {len(pose_hints)} pose_hints for {frame_count} frames",
+            "description": description
+        }
+
+    if frame_durations is not None and len(frame_durations) != frame_count:
+        return {
+            "ok": False,
+            "error": f"Got {len(frame_durations)} frame_durations for {frame_count} frames",
+            "description": description
+        }
+
+    if preview_format not in (None, "gif", "apng"):
+        return {
+            "ok": False,
+            "error": f"Unsupported preview_format '{preview_format}' (use 'gif', 'apng' or None)",
+            "description": description
+        }
+
+    paths = _animation_paths(output_dir, name, direction)
+    directory = paths["directory"]
+    base = paths["base"]
+    default_duration = max(1, round(1000 / fps)) if fps > 0 else 125
+
+    metadata = {
+        "name": name,
+        "description": description,
+        "view": view,
+        "direction": direction,
+        "no_background": no_background,
+        "frame_width": width,
+        "frame_height": height,
+        "frame_count": frame_count,
+        "fps": fps,
+        "strip": paths["strip"].name,
+        "preview_format": preview_format,
+        "preview": f"{base}_preview.gif" if preview_format == "gif" else f"{base}_preview.png" if preview_format else None,
+        "metadata": paths["metadata"].name,
+        "frames": [
+            {
+                "index": index,
+                "file": None,
+                "pose": pose_hints[index] if pose_hints else f"pose {index + 1} of the motion",
+                "x": index * width,
+                "y": 0,
+                "w": width,
+                "h": height,
+                "duration_ms": frame_durations[index] if frame_durations else default_duration
+            }
+            for index in range(frame_count)
+        ]
+    }
+
+    try:
+        errors = []
+        frames = []
+        with ThreadPoolExecutor(max_workers=max(1, min(ANIMATION_MAX_WORKERS, frame_count))) as executor:
+            futures = [executor.submit(_generate_frame, metadata, index) for index in range(frame_count)]
+
+            for index, future in enumerate(futures):
+                try:
+                    frames.append(future.result())
+                except Exception as e:
+                    errors.append({"frame": index, "error": str(e)})
+                    frames.append(None)
+                    continue
+                metadata["frames"][index]["file"] = _frame_filename(base, index)
+
+        _clear_stale_animation_outputs(directory, base, metadata)
+
+        for frame, frame_image in zip(metadata["frames"], frames):
+            if frame_image is not None:
+                output_writer.submit(
+                    directory / frame["file"],
+                    encode_image(frame_image, pnginfo=frame_pnginfo()),
+                    on_written=_index_when_written(frame_image, frame=True)
+                )
+
+        if not errors:
+            _assemble_animation(directory, metadata, frames)
+
+        output_writer.submit(paths["metadata"], json.dumps(metadata, indent=2).encode())
+
+        return _animation_result(directory, metadata, errors)
+
+    except Exception as e:
+        return {
+            "ok": False,
+            "error": str(e),
+            "description": description
+        }
+
+@mcp.tool()
+def regenerate_animation_frame(
+    name: str,
+    frame_index: int,
+    direction: str = "east",
+    pose_hint: Optional[str] = None,
+    output_dir: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Regenerate a single frame of an existing animation and rebuild its strip and preview.
+
+    Args:
+        name: Animation name passed to generate_animation
+        frame_index: Zero-based index of the frame to regenerate
+        direction: Facing direction the animation was generated with (default: "east")
+        pose_hint: Replacement pose description for this frame (default: keep the original)
+        output_dir: Directory the animation was saved to (default: project assets/animations)
+
+    Returns:
+        Dictionary with strip, preview, frame and metadata paths
+    """
+    paths = _animation_paths(output_dir, name, direction)
+    directory = paths["directory"]
+
+    try:
+        # Earlier frames and metadata may still be in the write queue
+        if not output_writer.wait(FLUSH_TIMEOUT):
+            return {
+                "ok": False,
+                "error": f"Timed out after {FLUSH_TIMEOUT}s waiting for queued writes",
+                "animation_name": name
+            }
+
+        if not paths["metadata"].exists():
+            return {
+                "ok": False,
+                "error": f"No animation metadata at {paths['metadata']}",
+                "animation_name": name
+            }
+
+        metadata = json.loads(paths["metadata"].read_text())
+
+        if not 0 <= frame_index < metadata["frame_count"]:
+            return {
+                "ok": False,
+                "error": f"frame_index must be between 0 and {metadata['frame_count'] - 1}",
+                "animation_name": name
+            }
+
+        if pose_hint:
+            metadata["frames"][frame_index]["pose"] = pose_hint
+
+        frame_image = _generate_frame(metadata, frame_index)
+
+        filename = _frame_filename(paths["base"], frame_index)
+        output_writer.submit(
+            directory / filename,
+            encode_image(frame_image, pnginfo=frame_pnginfo()),
+            on_written=_index_when_written(frame_image, frame=True)
+        )
+        metadata["frames"][frame_index]["file"] = filename
+
+        if all(frame["file"] for frame in metadata["frames"]):
+            frames = [
+                frame_image if frame["index"] == frame_index
+                else _fit_frame(Image.open(directory / frame["file"]), metadata)
+                for frame in metadata["frames"]
+            ]
+            _assemble_animation(directory, metadata, frames)
+
+        output_writer.submit(paths["metadata"], json.dumps(metadata, indent=2).encode())
+
+        result = _animation_result(directory, metadata, [])
+        result["regenerated_frame"] = frame_index
+        return result
+
+    except Exception as e:
+        return {
+            "ok": False,
+            "error": str(e),
+            "animation_name": name,
+            "frame_index": frame_index
+        }
+
+@mcp.tool()
+def flush_writes(timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Wait until every queued sprite, tile and animation file is written to disk.
+
+    Generation tools return as soon as their files are queued; call this before
+    reading the files back or handing them to another tool.
+
+    Args:
+        timeout: Max seconds to wait (default: wait until done)
+
+    Returns:
+        Dictionary with pending/written counts and any write errors since the last flush
+    """
+    result = output_writer.flush(timeout)
+    if result["pending"]:
+        result["error"] = f"Timed out with {result['pending']} writes still queued"
+    elif result["errors"]:
+        result["error"] = f"{len(result['errors'])} writes failed"
+    else:
+        result["message"] = f"✅ All writes flushed ({result['written']} files written)"
+    return result
+
+@mcp.tool()
+def find_similar(
+    file_path: str,
+    max_distance: Optional[int] = None,
+    limit: int = 10
+) -> Dict[str, Any]:
+    """
+    Find generated assets that look nearly identical to an image.
+
+    Args:
+        file_path: Image to compare (a generated asset or any other PNG)
+        max_distance: Max pHash Hamming distance out of 64 bits (default: PIXELLAB_SIMILARITY_THRESHOLD, 5)
+        limit: Max matches to return (default: 10)
+
+    Returns:
+        Dictionary with matches sorted by distance (0 = identical)
+    """
+    if max_distance is None:
+        max_distance = SIMILARITY_THRESHOLD
+
+    try:
+        path = Path(file_path)
+        if not path.exists():
+            # It may still be in the write queue
+            output_writer.wait(FLUSH_TIMEOUT)
+
+        with Image.open(path) as image:
+            matches = _existing_matches(image, max_distance=max_distance, exclude=path.resolve())[:limit]
+
+        return {
+            "ok": True,
+            "file_path": str(path.resolve()),
+            "max_distance": max_distance,
+            "matches": matches,
+            "indexed_images": len(asset_index),
+            "index_complete": asset_index.ready,
+            "message": f"Found {len(matches)} similar assets" + ("" if asset_index.ready else " (index still scanning)")
+        }
+
+    except Exception as e:
+        return {
+            "ok": False,
+            "error": str(e),
+            "file_path": file_path
+        }
+
 if __name__ == "__main__":
     # Run the MCP server
     mcp.run()